@@ -1,13 +1,20 @@
 """
 ai_server.py — Main FastAPI application for FinPort-AI.
+
+Model functions are blocking (MySQL I/O + NumPy/sklearn), so each async
+endpoint hands them to a worker thread with asyncio.to_thread and keeps the
+event loop free for other requests.
 """
 
+import asyncio
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from models.anomaly import detect_anomalies
 from models.rebalance import recommend_rebalance
 from models.lstm import forecast_prices
 from models.sentiment import analyze_sentiment
+from utils.db import DBBusyError
 
 app = FastAPI(
     title="FinPort-AI",
@@ -23,31 +30,35 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return {"status": "ok", "service": "FinPort-AI"}
 
 
 @app.post("/ai/anomalies")
-def run_anomaly_detection(contamination: float = 0.1):
+async def run_anomaly_detection(contamination: float = 0.1):
     """
-    Run Isolation Forest anomaly detection on the Transaction table.
+    Run anomaly detection (robust z-score, Isolation Forest for large
+    tables) on the Transaction table.
 
     Flagged transactions are written to the Alert table with:
       alert_type = 'Anomaly', severity = 'High'
 
     Optional query param:
-      contamination (float, default 0.1) — expected fraction of outliers.
+      contamination (float, default 0.1) — expected fraction of outliers;
+                                        caps the share of rows flagged.
     """
     try:
-        result = detect_anomalies(contamination=contamination)
+        result = await asyncio.to_thread(detect_anomalies, contamination=contamination)
         return result
+    except DBBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/ai/rebalance")
-def run_rebalance(drift_threshold: float = 10.0):
+async def run_rebalance(drift_threshold: float = 10.0):
     """
     Analyse portfolio asset allocations and recommend rebalancing.
 
@@ -61,14 +72,16 @@ def run_rebalance(drift_threshold: float = 10.0):
       drift_threshold (float, default 10.0) — minimum drift in percentage points.
     """
     try:
-        result = recommend_rebalance(drift_threshold=drift_threshold)
+        result = await asyncio.to_thread(recommend_rebalance, drift_threshold=drift_threshold)
         return result
+    except DBBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/ai/forecast")
-def run_price_forecast(down_threshold: float = -1.0):
+async def run_price_forecast(down_threshold: float = -1.0):
     """
     Forecast next-day prices for all securities using linear extrapolation
     over the 3-day price history in Price_History.
@@ -83,14 +96,16 @@ def run_price_forecast(down_threshold: float = -1.0):
     endpoint will be backed by a trained LSTM model once sufficient data exists.
     """
     try:
-        result = forecast_prices(down_threshold=down_threshold)
+        result = await asyncio.to_thread(forecast_prices, down_threshold=down_threshold)
         return result
+    except DBBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/ai/sentiment")
-def run_sentiment_analysis():
+async def run_sentiment_analysis():
     """
     Run sentiment analysis on all securities in the database.
 
@@ -101,10 +116,49 @@ def run_sentiment_analysis():
       severity   = 'Low' (positive) | 'Medium' (neutral) | 'High' (negative)
 
     Production upgrade: replace keyword scoring with FinBERT inference and
-    live NewsAPI headlines by setting NEWS_API_KEY in .env.
+    live NewsAPI headlines by setting NEWS_API_KEY in .env (read with
+    utils.db.get_env(), not os.getenv()).
     """
     try:
-        result = analyze_sentiment()
+        result = await asyncio.to_thread(analyze_sentiment)
         return result
+    except DBBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/ai/run_all")
+async def run_all_models(
+    contamination: float = 0.1,
+    drift_threshold: float = 10.0,
+    down_threshold: float = -1.0,
+):
+    """
+    Run all four models concurrently and return their results together.
+
+    The models are independent of each other, so their DB reads and CPU work
+    overlap in separate worker threads instead of running back to back.
+    Forecast and sentiment share the cached Price_History load.
+
+    Optional query params:
+      contamination, drift_threshold, down_threshold — as for the
+      individual endpoints.
+    """
+    try:
+        anomalies, rebalance, forecast, sentiment = await asyncio.gather(
+            asyncio.to_thread(detect_anomalies, contamination=contamination),
+            asyncio.to_thread(recommend_rebalance, drift_threshold=drift_threshold),
+            asyncio.to_thread(forecast_prices, down_threshold=down_threshold),
+            asyncio.to_thread(analyze_sentiment),
+        )
+    except DBBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "anomalies": anomalies,
+        "rebalance": rebalance,
+        "forecast":  forecast,
+        "sentiment": sentiment,
+    }
@@ -1,22 +1,86 @@
 """
-anomaly.py — Isolation Forest anomaly detection for FinPort-AI.
+anomaly.py — Transaction anomaly detection for FinPort-AI.
 
-Reads transactions from the Transaction table, runs Isolation Forest on
-(total_amount, fees, quantity), flags anomalies, and writes them to Alert.
+Reads transactions from the Transaction table, screens (total_amount, fees,
+quantity) with a per-column robust z-score (median/MAD), flags anomalies, and
+writes them to Alert. Tables larger than ROBUST_Z_MAX_ROWS fall back to
+Isolation Forest.
 """
 
-import pandas as pd
+import itertools
+import math
+
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from utils.db import managed_conn
+from utils.db import bulk_insert, managed_conn, read_frame, stream_query, transaction
+
+FETCH_BATCH_SIZE = 10_000  # rows pulled from the cursor per round-trip
+ROBUST_Z_MAX_ROWS = 50_000  # above this, use Isolation Forest instead
+ROBUST_Z_CUTOFF = 3.5       # modified z-score cutoff (Iglewicz & Hoaglin)
+
+
+def _load_transactions(conn) -> tuple[np.ndarray, np.ndarray]:
+    """Return (ids, features) for every row of the Transaction table.
+
+    ids is int64 [transaction_id, account_id]; features is float64
+    [total_amount, fees, quantity] with NULL as NaN. Uses connectorx when it
+    is installed, otherwise streams plain tuples off `conn` in
+    FETCH_BATCH_SIZE batches straight into column arrays.
+    """
+    query = """
+        SELECT transaction_id, account_id, total_amount, fees, quantity
+        FROM `Transaction`
+    """
+    df = read_frame(query)
+    if df is not None:
+        return (
+            df[["transaction_id", "account_id"]].to_numpy(dtype=np.int64),
+            df[["total_amount", "fees", "quantity"]].to_numpy(dtype=float),
+        )
+
+    id_chunks, feature_chunks = [], []
+    for batch in stream_query(conn, query, arraysize=FETCH_BATCH_SIZE):
+        id_chunks.append(np.array([r[:2] for r in batch], dtype=np.int64))
+        feature_chunks.append(np.array([r[2:] for r in batch], dtype=float))
+    if not id_chunks:
+        return np.empty((0, 2), dtype=np.int64), np.empty((0, 3), dtype=float)
+    return np.vstack(id_chunks), np.vstack(feature_chunks)
+
+
+def _robust_z_outliers(features: np.ndarray, contamination: float) -> np.ndarray:
+    """Boolean mask of rows whose modified z-score exceeds ROBUST_Z_CUTOFF.
+
+    Each column is scored as 0.6745 * |x - median| / MAD, falling back to the
+    mean absolute deviation when over half the column shares one value (MAD
+    of 0); a constant column scores 0. A row is flagged on its worst column,
+    and at most `contamination` of the rows are flagged, highest scores first.
+    """
+    dev = np.abs(features - np.median(features, axis=0))
+    mad = np.median(dev, axis=0)
+    scale = np.where(mad > 0, mad / 0.6745, dev.mean(axis=0) * 1.2533)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(scale > 0, dev / scale, 0.0)
+    score = z.max(axis=1)
+
+    mask = score > ROBUST_Z_CUTOFF
+    limit = math.ceil(contamination * len(score))
+    if mask.sum() > limit:
+        mask[:] = False
+        mask[np.argsort(-score, kind="stable")[:limit]] = True
+    return mask
 
 
 def detect_anomalies(contamination: float = 0.1) -> dict:
     """
-    Detect anomalous transactions using Isolation Forest.
+    Detect anomalous transactions with a robust z-score screen, or Isolation
+    Forest once the table exceeds ROBUST_Z_MAX_ROWS.
 
     Args:
         contamination: Expected proportion of outliers in the dataset (default 0.1).
+                       Caps the share of rows the z-score screen may flag.
+                       Must be in (0, 0.5], as for Isolation Forest.
+
+    Raises:
+        ValueError: if contamination is outside (0, 0.5].
 
     Returns:
         dict with keys:
@@ -25,79 +89,96 @@ def detect_anomalies(contamination: float = 0.1) -> dict:
             alerts_written      — number of rows inserted into Alert
             flagged_ids         — list of transaction_ids that were flagged
     """
+    # Checked up front so both scoring paths accept the same range
+    if not 0 < contamination <= 0.5:
+        raise ValueError(f"contamination must be in (0, 0.5], got {contamination}")
+
+    # pandas (and sklearn, for large tables) are imported on first call so
+    # workers that never serve /ai/anomalies don't load them
+    import pandas as pd
+
     # ------------------------------------------------------------------ #
-    # 1. Load transaction data
+    # 1. Load transaction data as typed column arrays
+    #    One connection serves both the read and the Alert write below;
+    #    the transaction is opened only around the write (step 4)
     # ------------------------------------------------------------------ #
-    query = """
-        SELECT transaction_id, account_id, total_amount, fees, quantity
-        FROM `Transaction`
-    """
     with managed_conn() as conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query)
-        rows = cursor.fetchall()
-    df = pd.DataFrame(rows)
+        ids, features = _load_transactions(conn)
 
-    if df.empty:
-        return {
-            "total_transactions": 0,
-            "anomalies_detected": 0,
-            "alerts_written": 0,
-            "flagged_ids": [],
-        }
+        if len(ids) == 0:
+            return {
+                "total_transactions": 0,
+                "anomalies_detected": 0,
+                "alerts_written": 0,
+                "flagged_ids": [],
+            }
 
-    # ------------------------------------------------------------------ #
-    # 2. Prepare feature matrix
-    #    quantity can be NULL (e.g. Deposit/Withdrawal rows) — fill with 0
-    # ------------------------------------------------------------------ #
-    features = df[["total_amount", "fees", "quantity"]].fillna(0).astype(float)
+        # ------------------------------------------------------------------ #
+        # 2. Prepare feature matrix
+        #    quantity can be NULL (e.g. Deposit/Withdrawal rows) — fill with 0
+        # ------------------------------------------------------------------ #
+        features = np.nan_to_num(features, nan=0.0)
+        df = pd.DataFrame({
+            "transaction_id": ids[:, 0],
+            "account_id":     ids[:, 1],
+            "total_amount":   features[:, 0],
+            "fees":           features[:, 1],
+            "quantity":       features[:, 2],
+        })
 
-    # ------------------------------------------------------------------ #
-    # 3. Run Isolation Forest
-    # ------------------------------------------------------------------ #
-    model = IsolationForest(contamination=contamination, random_state=42)
-    df["score"] = model.fit_predict(features)   # -1 = anomaly, 1 = normal
+        # ------------------------------------------------------------------ #
+        # 3. Flag outliers
+        #    A median/MAD screen is O(n) and needs no model; Isolation Forest
+        #    (float32 input, all cores) only runs on large tables
+        # ------------------------------------------------------------------ #
+        if len(df) <= ROBUST_Z_MAX_ROWS:
+            df["score"] = np.where(_robust_z_outliers(features, contamination), -1, 1)
+        else:
+            from sklearn.ensemble import IsolationForest
 
-    anomalies = df[df["score"] == -1].copy()
+            model = IsolationForest(
+                n_estimators=100,
+                contamination=contamination,
+                random_state=42,
+                n_jobs=-1,
+            )
+            df["score"] = model.fit_predict(features.astype(np.float32))   # -1 = anomaly, 1 = normal
 
-    if anomalies.empty:
-        return {
-            "total_transactions": len(df),
-            "anomalies_detected": 0,
-            "alerts_written": 0,
-            "flagged_ids": [],
-        }
+        anomalies = df[df["score"] == -1].copy()
 
-    # ------------------------------------------------------------------ #
-    # 4. Write alerts to the Alert table
-    # ------------------------------------------------------------------ #
-    insert_sql = """
-        INSERT INTO Alert (account_id, alert_type, severity, message)
-        VALUES (%s, %s, %s, %s)
-    """
+        if anomalies.empty:
+            return {
+                "total_transactions": len(df),
+                "anomalies_detected": 0,
+                "alerts_written": 0,
+                "flagged_ids": [],
+            }
 
-    alerts_written = 0
-    with managed_conn() as conn:
-        cursor = conn.cursor()
-        for _, row in anomalies.iterrows():
-            message = (
-                f"Anomalous transaction detected: transaction_id={int(row['transaction_id'])} "
-                f"(total_amount={float(row['total_amount']):.2f}, "
-                f"fees={float(row['fees']):.2f}, "
-                f"quantity={float(row['quantity'] or 0):.4f})."
+        # ------------------------------------------------------------------ #
+        # 4. Write alerts to the Alert table
+        # ------------------------------------------------------------------ #
+        anomalies = anomalies.assign(message=(
+            "Anomalous transaction detected: transaction_id="
+            + anomalies["transaction_id"].astype(str)
+            + " (total_amount=" + anomalies["total_amount"].map("{:.2f}".format)
+            + ", fees=" + anomalies["fees"].map("{:.2f}".format)
+            + ", quantity=" + anomalies["quantity"].map("{:.4f}".format) + ")."
+        ))
+        params = list(zip(
+            anomalies["account_id"].tolist(),
+            itertools.repeat("Anomaly"),
+            itertools.repeat("High"),
+            anomalies["message"],
+        ))
+
+        with transaction(conn):
+            alerts_written = bulk_insert(
+                conn, "Alert", ("account_id", "alert_type", "severity", "message"), params
             )
-            cursor.execute(insert_sql, (
-                int(row["account_id"]),
-                "Anomaly",
-                "High",
-                message,
-            ))
-            alerts_written += 1
-        conn.commit()
-
-    return {
-        "total_transactions": len(df),
-        "anomalies_detected": len(anomalies),
-        "alerts_written": alerts_written,
-        "flagged_ids": [int(i) for i in anomalies["transaction_id"].tolist()],
-    }
+
+        return {
+            "total_transactions": len(df),
+            "anomalies_detected": len(anomalies),
+            "alerts_written": alerts_written,
+            "flagged_ids": [int(i) for i in anomalies["transaction_id"].tolist()],
+        }
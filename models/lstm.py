@@ -3,7 +3,7 @@ lstm.py — Price forecasting model for FinPort-AI.
 
 Uses linear extrapolation over 3-day price history as a statistically honest
 substitute for LSTM given the limited dataset (3 data points per security).
-In production, replace _extrapolate_next_price() with a trained LSTM model
+In production, replace _extrapolate_next_prices() with a trained LSTM model
 once sufficient historical data is available (minimum ~60 days recommended).
 
 Per-security metrics computed:
@@ -14,76 +14,84 @@ Per-security metrics computed:
 """
 
 import numpy as np
-from utils.db import managed_conn
+from models.price_history import load_price_history
+from utils.db import bulk_insert, managed_txn
 
 FLAT_BAND = 0.5        # % — momentum within this range is classified FLAT
 DOWN_ALERT_PCT = -1.0  # % — securities below this trigger a Price Forecast alert
 
+# (price-history snapshot, forecasts computed from it) — see _compute_forecasts()
+_last_forecasts: tuple[dict, list[dict]] | None = None
 
-def _extrapolate_next_price(prices: list[float]) -> float:
-    """Fit a least-squares line to the price series and return the next value."""
-    x = np.arange(len(prices), dtype=float)
-    slope, intercept = np.polyfit(x, prices, deg=1)
-    return float(intercept + slope * len(prices))
 
+def _extrapolate_next_prices(prices: np.ndarray) -> np.ndarray:
+    """Fit a least-squares line to each row of an (n_securities, n_days) price
+    matrix and return the next value per row.
 
-def forecast_prices(down_threshold: float = DOWN_ALERT_PCT) -> dict:
-    """
-    Compute price forecasts for all securities in Price_History.
-
-    Args:
-        down_threshold: Momentum % below which a Price Forecast alert is raised
-                        (default -1.0).
-
-    Returns:
-        dict with keys:
-            securities_analysed  — number of securities processed
-            alerts_written       — number of DOWN alerts inserted into Alert
-            forecasts            — list of per-security forecast dicts
+    Uses the closed-form slope/intercept, so every security sharing the same
+    history length is fitted in one pass instead of one np.polyfit call each.
     """
-    # ------------------------------------------------------------------ #
-    # 1. Load price history ordered by security and date
-    # ------------------------------------------------------------------ #
-    query = """
-        SELECT ph.security_id, s.ticker, s.security_name,
-               ph.price_date, ph.close_price
-        FROM Price_History ph
-        JOIN Security s ON ph.security_id = s.security_id
-        ORDER BY ph.security_id, ph.price_date
+    n = prices.shape[1]
+    if n < 2:
+        return prices[:, -1].copy()
+    if n == 3:
+        # x = [0, 1, 2]: slope = (p2 - p0) / 2 and the fitted line passes
+        # through (1, mean), so the value at x = 3 is mean + 2 * slope
+        return prices.mean(axis=1) + (prices[:, 2] - prices[:, 0])
+    x = np.arange(n, dtype=float)
+    x_dev = x - x.mean()
+    p_mean = prices.mean(axis=1)
+    slope = ((prices - p_mean[:, None]) * x_dev).sum(axis=1) / (x_dev ** 2).sum()
+    intercept = p_mean - slope * x.mean()
+    return intercept + slope * n
+
+
+def _compute_forecasts(securities: dict[int, list[dict]]) -> list[dict]:
+    """Return the per-security forecast dicts for a price-history snapshot.
+
+    The result depends only on the snapshot, not on the alert threshold, so
+    it is kept alongside the snapshot it came from: load_price_history()
+    returns the same object until its cache expires, and repeated calls in
+    that window reuse the forecasts instead of recomputing them. The returned
+    list is shared and must not be mutated.
     """
-    with managed_conn() as conn:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query)
-        rows = cur.fetchall()
-
-    if not rows:
-        return {"securities_analysed": 0, "alerts_written": 0, "forecasts": []}
-
-    # Group rows by security_id
-    securities: dict[int, list] = {}
-    for row in rows:
-        sid = row["security_id"]
-        securities.setdefault(sid, []).append(row)
+    global _last_forecasts
+    if _last_forecasts is not None and _last_forecasts[0] is securities:
+        return _last_forecasts[1]
+
+    # Securities with the same number of price points are stacked into
+    # one matrix so moving average, momentum and the linear fit run as
+    # column operations over all of them at once
+    by_length: dict[int, list[int]] = {}
+    for sid, price_rows in securities.items():
+        by_length.setdefault(len(price_rows), []).append(sid)
+
+    metrics: dict[int, tuple[float, float, float, float]] = {}
+    for sids in by_length.values():
+        P = np.array(
+            [[float(r["close_price"]) for r in securities[sid]] for sid in sids],
+            dtype=float,
+        )
+        moving_avgs = P.mean(axis=1)
+        momentums = (P[:, -1] - P[:, 0]) / P[:, 0] * 100
+        predictions = _extrapolate_next_prices(P)
+        for i, sid in enumerate(sids):
+            metrics[sid] = (
+                float(P[i, -1]), float(moving_avgs[i]),
+                float(momentums[i]), float(predictions[i]),
+            )
 
-    # ------------------------------------------------------------------ #
-    # 2. Compute metrics per security
-    # ------------------------------------------------------------------ #
     forecasts = []
-    down_alerts = []
-
     for sid, price_rows in securities.items():
-        # Sort by date (already ordered, but defensive)
-        price_rows.sort(key=lambda r: r["price_date"])
-
-        prices = [float(r["close_price"]) for r in price_rows]
         ticker = price_rows[0]["ticker"]
         security_name = price_rows[0]["security_name"]
         latest_date = price_rows[-1]["price_date"]
+        latest_price, moving_avg, momentum_pct, predicted_price = metrics[sid]
 
-        n = len(prices)
-        moving_avg = round(sum(prices) / n, 4)
-        momentum_pct = round((prices[-1] - prices[0]) / prices[0] * 100, 4)
-        predicted_price = round(_extrapolate_next_price(prices), 4)
+        n = len(price_rows)
+        moving_avg = round(moving_avg, 4)
+        momentum_pct = round(momentum_pct, 4)
+        predicted_price = round(predicted_price, 4)
 
         if momentum_pct > FLAT_BAND:
             trend = "UP"
@@ -92,67 +100,74 @@ def forecast_prices(down_threshold: float = DOWN_ALERT_PCT) -> dict:
         else:
             trend = "FLAT"
 
-        forecast = {
+        forecasts.append({
             "security_id":     sid,
             "ticker":          ticker,
             "security_name":   security_name,
             "data_points":     n,
             "latest_date":     str(latest_date),
-            "latest_price":    round(prices[-1], 4),
+            "latest_price":    round(latest_price, 4),
             "moving_avg_3d":   moving_avg,
             "momentum_pct":    momentum_pct,
             "predicted_price": predicted_price,
             "trend":           trend,
-        }
-        forecasts.append(forecast)
-
-        # Flag securities trending down more than down_threshold
-        if momentum_pct < down_threshold:
-            down_alerts.append({
-                "security_id": sid,
-                "ticker":      ticker,
-                "momentum_pct": momentum_pct,
-                "predicted_price": predicted_price,
-            })
+        })
+
+    _last_forecasts = (securities, forecasts)
+    return forecasts
+
+
+def forecast_prices(down_threshold: float = DOWN_ALERT_PCT) -> dict:
+    """
+    Compute price forecasts for all securities in Price_History.
+
+    Args:
+        down_threshold: Momentum % below which a Price Forecast alert is raised
+                        (default -1.0).
+
+    Returns:
+        dict with keys:
+            securities_analysed  — number of securities processed
+            alerts_written       — number of DOWN alerts inserted into Alert
+            forecasts            — list of per-security forecast dicts
+    """
+    # ------------------------------------------------------------------ #
+    # 1. Load price history grouped by security, in date order, together
+    #    with the first account holding each security (needed for alerts)
+    # ------------------------------------------------------------------ #
+    securities = load_price_history()
+
+    if not securities:
+        return {"securities_analysed": 0, "alerts_written": 0, "forecasts": []}
+
+    # ------------------------------------------------------------------ #
+    # 2. Compute metrics per security and flag those trending down more
+    #    than down_threshold
+    # ------------------------------------------------------------------ #
+    forecasts = _compute_forecasts(securities)
+    down_alerts = [f for f in forecasts if f["momentum_pct"] < down_threshold]
 
     # ------------------------------------------------------------------ #
     # 3. Write DOWN alerts to Alert table
     #    account_id is required (NOT NULL) — use the first account that
-    #    holds this security via its portfolio
+    #    holds this security via its portfolio, falling back to account 1
     # ------------------------------------------------------------------ #
     alerts_written = 0
     if down_alerts:
-        # Build security_id -> account_id lookup
-        placeholders = ", ".join(["%s"] * len(down_alerts))
-        sid_list = [a["security_id"] for a in down_alerts]
-        account_query = f"""
-            SELECT h.security_id, MIN(p.account_id) AS account_id
-            FROM Holding h
-            JOIN Portfolio p ON h.portfolio_id = p.portfolio_id
-            WHERE h.security_id IN ({placeholders})
-            GROUP BY h.security_id
-        """
-        with managed_conn() as conn:
-            cur = conn.cursor(dictionary=True)
-            cur.execute(account_query, sid_list)
-            account_map = {r["security_id"]: r["account_id"] for r in cur.fetchall()}
-
-        insert_sql = """
-            INSERT INTO Alert (account_id, alert_type, severity, message)
-            VALUES (%s, %s, %s, %s)
-        """
-        with managed_conn() as conn:
-            cur = conn.cursor()
-            for alert in down_alerts:
-                account_id = account_map.get(alert["security_id"], 1)
-                message = (
-                    f"Price forecast alert: {alert['ticker']} shows downward momentum "
-                    f"of {alert['momentum_pct']:.2f}% over the last 3 days. "
-                    f"Predicted next-day price: {alert['predicted_price']:.4f}."
-                )
-                cur.execute(insert_sql, (account_id, "Price Forecast", "Medium", message))
-                alerts_written += 1
-            conn.commit()
+        params = []
+        for alert in down_alerts:
+            account_id = securities[alert["security_id"]][0]["account_id"] or 1
+            message = (
+                f"Price forecast alert: {alert['ticker']} shows downward momentum "
+                f"of {alert['momentum_pct']:.2f}% over the last 3 days. "
+                f"Predicted next-day price: {alert['predicted_price']:.4f}."
+            )
+            params.append((account_id, "Price Forecast", "Medium", message))
+
+        with managed_txn() as conn:
+            alerts_written = bulk_insert(
+                conn, "Alert", ("account_id", "alert_type", "severity", "message"), params
+            )
 
     return {
         "securities_analysed": len(forecasts),
@@ -0,0 +1,44 @@
+"""
+price_history.py — Shared Price_History loader for FinPort-AI.
+
+forecast_prices() and analyze_sentiment() read the same price history, so
+both go through load_price_history() and share one cached result.
+"""
+
+from itertools import groupby
+from operator import itemgetter
+
+from utils.cache import ttl_cache
+from utils.db import managed_conn
+
+
+@ttl_cache()
+def load_price_history() -> dict[int, list[dict]]:
+    """Return {security_id: [row, ...]} with each security's rows in date order.
+
+    Every row carries ticker, security_name, price_date, close_price and
+    account_id — the first account holding the security (NULL if none).
+    The result is shared between callers and must not be mutated.
+    """
+    query = """
+        SELECT ph.security_id, s.ticker, s.security_name,
+               ph.price_date, ph.close_price, acc.account_id
+        FROM Price_History ph
+        JOIN Security s ON ph.security_id = s.security_id
+        LEFT JOIN (
+            SELECT h.security_id, MIN(p.account_id) AS account_id
+            FROM Holding h
+            JOIN Portfolio p ON h.portfolio_id = p.portfolio_id
+            GROUP BY h.security_id
+        ) acc ON acc.security_id = ph.security_id
+        ORDER BY ph.security_id, ph.price_date
+    """
+    with managed_conn("ro") as conn:
+        cur = conn.cursor(dictionary=True, buffered=False)
+        cur.execute(query)
+
+        # Rows arrive ordered by (security_id, price_date), so they are
+        # streamed off the cursor and grouped in a single linear pass
+        return {
+            sid: list(group) for sid, group in groupby(cur, key=itemgetter("security_id"))
+        }
@@ -1,15 +1,18 @@
 """
 rebalance.py — Smart portfolio rebalancing engine for FinPort-AI.
 
-Reads current asset allocation from vw_asset_allocation, compares against
-target weights, flags portfolios where any asset class drifts more than
+Compares current asset allocation from vw_asset_allocation against target
+weights, flags portfolios where any asset class drifts more than
 DRIFT_THRESHOLD percentage points from its target, and writes recommendations
-to the Rebalance_Log table.
+to the Rebalance_Log table. The drift itself is computed in MySQL so only
+breaching (portfolio, asset_class) rows are returned.
 """
 
 import datetime
-import pandas as pd
-from utils.db import managed_conn
+from itertools import groupby
+from operator import itemgetter
+
+from utils.db import bulk_insert, managed_conn, transaction
 
 # Target allocation (must sum to 100)
 TARGET_ALLOCATIONS = {
@@ -25,41 +28,74 @@ TARGET_ALLOCATIONS = {
 DRIFT_THRESHOLD = 10.0  # percentage points
 
 
-def _get_allocations() -> pd.DataFrame:
-    """Return vw_asset_allocation as a DataFrame."""
-    query = "SELECT portfolio_id, portfolio_name, asset_class, class_value FROM vw_asset_allocation"
-    with managed_conn() as conn:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query)
-        rows = cur.fetchall()
-    return pd.DataFrame(rows)
-
-
-def _get_advisor_map() -> dict:
-    """Return {portfolio_id: advisor_id} using the primary advisor per portfolio.
+def _drift_query() -> str:
+    """Build the SQL that returns every (portfolio, target class) over threshold.
 
-    Falls back to any active advisor when no primary is flagged.
+    Percentages are computed in MySQL against each portfolio's total — which
+    includes classes outside TARGET_ALLOCATIONS — and target classes a
+    portfolio does not hold count as 0%. Only breaching rows cross the wire.
+    Each row also carries the portfolio's advisor: the primary active advisor,
+    else any active one, else NULL.
+    Params: (ord, asset_class, target_pct) per target, then drift_threshold.
     """
-    query = """
-        SELECT p.portfolio_id, ca.advisor_id, ca.is_primary
-        FROM Portfolio p
-        JOIN Account a  ON p.account_id  = a.account_id
-        JOIN Client_Advisor ca ON a.client_id = ca.client_id
-        WHERE ca.end_date IS NULL OR ca.end_date >= CURDATE()
-        ORDER BY p.portfolio_id, ca.is_primary DESC
+    targets_sql = "\n            UNION ALL ".join(
+        ["SELECT %s AS ord, %s AS asset_class, %s AS target_pct"] * len(TARGET_ALLOCATIONS)
+    )
+    return f"""
+        WITH alloc AS (
+            SELECT portfolio_id, portfolio_name, asset_class,
+                   CAST(class_value AS DOUBLE) AS class_value,
+                   SUM(CAST(class_value AS DOUBLE)) OVER (PARTITION BY portfolio_id) AS total_value
+            FROM vw_asset_allocation
+        ),
+        targets AS (
+            {targets_sql}
+        ),
+        drift AS (
+            SELECT p.portfolio_id, p.portfolio_name, p.total_value,
+                   t.ord, t.asset_class, t.target_pct,
+                   COALESCE(SUM(a.class_value), 0) / p.total_value * 100 AS actual_pct
+            FROM (
+                SELECT portfolio_id, MIN(portfolio_name) AS portfolio_name,
+                       MAX(total_value) AS total_value
+                FROM alloc
+                GROUP BY portfolio_id
+                HAVING MAX(total_value) <> 0
+            ) p
+            CROSS JOIN targets t
+            LEFT JOIN alloc a
+                   ON a.portfolio_id = p.portfolio_id AND a.asset_class = t.asset_class
+            GROUP BY p.portfolio_id, p.portfolio_name, p.total_value,
+                     t.ord, t.asset_class, t.target_pct
+        ),
+        advisor AS (
+            SELECT portfolio_id, advisor_id
+            FROM (
+                SELECT p.portfolio_id, ca.advisor_id,
+                       ROW_NUMBER() OVER (PARTITION BY p.portfolio_id
+                                          ORDER BY ca.is_primary DESC) AS rn
+                FROM Portfolio p
+                JOIN Account a  ON p.account_id  = a.account_id
+                JOIN Client_Advisor ca ON a.client_id = ca.client_id
+                WHERE ca.end_date IS NULL OR ca.end_date >= CURDATE()
+            ) ranked
+            WHERE rn = 1
+        )
+        SELECT d.portfolio_id, d.portfolio_name, d.total_value,
+               d.asset_class, d.target_pct, d.actual_pct, adv.advisor_id
+        FROM drift d
+        LEFT JOIN advisor adv ON adv.portfolio_id = d.portfolio_id
+        WHERE ABS(ROUND(d.actual_pct - d.target_pct, 2)) > %s
+        ORDER BY d.portfolio_id, d.ord
     """
-    with managed_conn() as conn:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query)
-        rows = cur.fetchall()
 
-    # First row per portfolio wins (ORDER BY is_primary DESC puts primary first)
-    advisor_map = {}
-    for row in rows:
-        pid = row["portfolio_id"]
-        if pid not in advisor_map:
-            advisor_map[pid] = row["advisor_id"]
-    return advisor_map
+
+_DRIFT_SQL = _drift_query()
+_TARGET_PARAMS = [
+    value
+    for ord_, (asset_class, target_pct) in enumerate(TARGET_ALLOCATIONS.items())
+    for value in (ord_, asset_class, target_pct)
+]
 
 
 def recommend_rebalance(drift_threshold: float = DRIFT_THRESHOLD) -> dict:
@@ -76,100 +112,83 @@ def recommend_rebalance(drift_threshold: float = DRIFT_THRESHOLD) -> dict:
             logs_written           — rows inserted into Rebalance_Log
             recommendations        — list of per-portfolio drift summaries
     """
-    df = _get_allocations()
-    if df.empty:
-        return {
-            "portfolios_analysed": 0,
-            "portfolios_flagged": 0,
-            "logs_written": 0,
-            "recommendations": [],
-        }
-
-    df["class_value"] = df["class_value"].astype(float)
-    advisor_map = _get_advisor_map()
-    today = datetime.date.today()
-
-    recommendations = []
-    log_rows = []
-
-    for portfolio_id, group in df.groupby("portfolio_id"):
-        portfolio_name = group["portfolio_name"].iloc[0]
-        total_value = group["class_value"].sum()
-        if total_value == 0:
-            continue
-
-        # Build current allocation dict (asset classes not present default to 0%)
-        current = {row["asset_class"]: (row["class_value"] / total_value) * 100
-                   for _, row in group.iterrows()}
-
-        # Compute drift for every target asset class
-        drifts = {}
-        for asset_class, target_pct in TARGET_ALLOCATIONS.items():
-            actual_pct = float(current.get(asset_class, 0.0))
-            drift = actual_pct - target_pct
-            drifts[asset_class] = {
-                "target_pct": round(target_pct, 2),
-                "actual_pct": round(actual_pct, 2),
-                "drift_pct":  round(drift, 2),
+    # The reads autocommit; the transaction is opened only around the
+    # Rebalance_Log write at the end
+    with managed_conn() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("SELECT COUNT(DISTINCT portfolio_id) AS n FROM vw_asset_allocation")
+        portfolios_analysed = cur.fetchone()["n"]
+        cur.execute(_DRIFT_SQL, _TARGET_PARAMS + [drift_threshold])
+        drift_rows = cur.fetchall()
+
+        if not drift_rows:
+            return {
+                "portfolios_analysed": portfolios_analysed,
+                "portfolios_flagged": 0,
+                "logs_written": 0,
+                "recommendations": [],
             }
 
-        # Flag classes that exceed the threshold
-        flagged = {k: v for k, v in drifts.items()
-                   if abs(v["drift_pct"]) > drift_threshold}
-
-        if not flagged:
-            continue
-
-        # Build human-readable reason
-        parts = []
-        for ac, info in flagged.items():
-            direction = "overweight" if info["drift_pct"] > 0 else "underweight"
-            parts.append(
-                f"{ac} is {direction} at {info['actual_pct']:.1f}% "
-                f"(target {info['target_pct']:.1f}%, drift {info['drift_pct']:+.1f}%)"
+        today = datetime.date.today()
+
+        recommendations = []
+        log_rows = []
+
+        # Rows are ordered by portfolio, so each group holds one portfolio's
+        # flagged classes in TARGET_ALLOCATIONS order
+        for portfolio_id, group in groupby(drift_rows, key=itemgetter("portfolio_id")):
+            rows = list(group)
+            flagged = {}
+            for row in rows:
+                actual_pct = float(row["actual_pct"])
+                target_pct = float(row["target_pct"])
+                flagged[row["asset_class"]] = {
+                    "target_pct": round(target_pct, 2),
+                    "actual_pct": round(actual_pct, 2),
+                    "drift_pct":  round(actual_pct - target_pct, 2),
+                }
+            portfolio_name = rows[0]["portfolio_name"]
+            total_value = rows[0]["total_value"]
+
+            # Build human-readable reason
+            parts = []
+            for ac, info in flagged.items():
+                direction = "overweight" if info["drift_pct"] > 0 else "underweight"
+                parts.append(
+                    f"{ac} is {direction} at {info['actual_pct']:.1f}% "
+                    f"(target {info['target_pct']:.1f}%, drift {info['drift_pct']:+.1f}%)"
+                )
+            reason = "Rebalancing required — " + "; ".join(parts) + "."
+
+            advisor_id = rows[0]["advisor_id"] or 1   # fallback to advisor 1
+
+            log_rows.append({
+                "portfolio_id": int(portfolio_id),
+                "advisor_id":   int(advisor_id),
+                "rebalance_date": today,
+                "reason":       reason,
+                "status":       "Pending",
+            })
+
+            recommendations.append({
+                "portfolio_id":   int(portfolio_id),
+                "portfolio_name": portfolio_name,
+                "total_value":    round(float(total_value), 2),
+                "flagged_classes": flagged,
+                "reason":         reason,
+            })
+
+        # Write to Rebalance_Log
+        columns = ("portfolio_id", "advisor_id", "rebalance_date", "reason", "status")
+        with transaction(conn):
+            logs_written = bulk_insert(
+                conn, "Rebalance_Log", columns,
+                [tuple(row[c] for c in columns) for row in log_rows],
             )
-        reason = "Rebalancing required — " + "; ".join(parts) + "."
-
-        advisor_id = advisor_map.get(portfolio_id, 1)   # fallback to advisor 1
-
-        log_rows.append({
-            "portfolio_id": int(portfolio_id),
-            "advisor_id":   int(advisor_id),
-            "rebalance_date": today,
-            "reason":       reason,
-            "status":       "Pending",
-        })
-
-        recommendations.append({
-            "portfolio_id":   int(portfolio_id),
-            "portfolio_name": portfolio_name,
-            "total_value":    round(float(total_value), 2),
-            "flagged_classes": flagged,
-            "reason":         reason,
-        })
-
-    # Write to Rebalance_Log
-    insert_sql = """
-        INSERT INTO Rebalance_Log (portfolio_id, advisor_id, rebalance_date, reason, status)
-        VALUES (%s, %s, %s, %s, %s)
-    """
-    logs_written = 0
-    with managed_conn() as conn:
-        cur = conn.cursor()
-        for row in log_rows:
-            cur.execute(insert_sql, (
-                row["portfolio_id"],
-                row["advisor_id"],
-                row["rebalance_date"],
-                row["reason"],
-                row["status"],
-            ))
-            logs_written += 1
-        conn.commit()
-
-    return {
-        "portfolios_analysed": df["portfolio_id"].nunique(),
-        "portfolios_flagged":  len(recommendations),
-        "logs_written":        logs_written,
-        "recommendations":     recommendations,
-    }
+
+        return {
+            "portfolios_analysed": portfolios_analysed,
+            "portfolios_flagged":  len(recommendations),
+            "logs_written":        logs_written,
+            "recommendations":     recommendations,
+        }
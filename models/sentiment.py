@@ -6,7 +6,7 @@ headlines. This demonstrates the full pipeline and output structure cleanly.
 
 Production upgrade path:
   1. Replace _generate_headline() with a NewsAPI call:
-       newsapi = NewsApiClient(api_key=os.getenv('NEWS_API_KEY'))
+       newsapi = NewsApiClient(api_key=get_env('NEWS_API_KEY'))   # utils.db.get_env
        articles = newsapi.get_everything(q=ticker, language='en', page_size=5)
   2. Replace _score_headline() with FinBERT inference:
        from transformers import pipeline
@@ -17,24 +17,36 @@ The Alert rows written, severity mapping, and return schema are identical
 regardless of which scoring backend is used.
 """
 
-from utils.db import managed_conn
+import re
+
+from models.price_history import load_price_history
+from utils.db import bulk_insert, managed_txn
 
 # ------------------------------------------------------------------ #
 # Keyword dictionaries
 # ------------------------------------------------------------------ #
-BULLISH_WORDS = {
+BULLISH_WORDS = frozenset({
     "surges", "rallies", "climbs", "gains", "soars", "rises", "jumps",
     "outperforms", "beats", "upgrades", "upgraded", "record", "strong",
     "growth", "momentum", "bullish", "positive", "confidence", "buying",
     "breakout", "upside", "recovery", "expansion", "robust", "optimism",
-}
+})
 
-BEARISH_WORDS = {
+BEARISH_WORDS = frozenset({
     "falls", "drops", "slips", "tumbles", "plunges", "declines", "sinks",
     "underperforms", "misses", "downgrades", "downgraded", "weak", "loss",
     "bearish", "negative", "concern", "selling", "breakdown", "downside",
     "risk", "uncertainty", "contraction", "caution", "pressure", "warning",
-}
+})
+
+_KEYWORDS = BULLISH_WORDS | BEARISH_WORDS
+
+# One alternation over both dictionaries: a headline is scanned once, with no
+# Python-level tokenisation. Longest keywords first so multi-word phrases win
+# over their prefixes; \b keeps "gains" from matching inside "regains".
+_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(_KEYWORDS, key=len, reverse=True)) + r")\b"
+)
 
 # ------------------------------------------------------------------ #
 # Headline templates keyed by trend direction
@@ -70,36 +82,9 @@ _SEVERITY = {"positive": "Low", "neutral": "Medium", "negative": "High"}
 
 def _get_price_trends() -> dict[int, dict]:
     """Return {security_id: {ticker, security_name, momentum_pct, trend, account_id}}."""
-    query = """
-        SELECT ph.security_id, s.ticker, s.security_name, ph.price_date, ph.close_price
-        FROM Price_History ph
-        JOIN Security s ON ph.security_id = s.security_id
-        ORDER BY ph.security_id, ph.price_date
-    """
-    account_query = """
-        SELECT h.security_id, MIN(p.account_id) AS account_id
-        FROM Holding h
-        JOIN Portfolio p ON h.portfolio_id = p.portfolio_id
-        GROUP BY h.security_id
-    """
-    with managed_conn() as conn:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query)
-        price_rows = cur.fetchall()
-        cur.execute(account_query)
-        account_rows = cur.fetchall()
-
-    account_map = {r["security_id"]: r["account_id"] for r in account_rows}
-
-    # Group prices by security and compute trend
-    groups: dict[int, list] = {}
-    for row in price_rows:
-        groups.setdefault(row["security_id"], []).append(row)
-
     FLAT_BAND = 0.5
     trends = {}
-    for sid, rows in groups.items():
-        rows.sort(key=lambda r: r["price_date"])
+    for sid, rows in load_price_history().items():
         prices = [float(r["close_price"]) for r in rows]
         momentum = (prices[-1] - prices[0]) / prices[0] * 100
 
@@ -115,16 +100,20 @@ def _get_price_trends() -> dict[int, dict]:
             "security_name": rows[0]["security_name"],
             "momentum_pct":  round(momentum, 4),
             "trend":         trend,
-            "account_id":    account_map.get(sid, 1),
+            "account_id":    rows[0]["account_id"] or 1,
         }
     return trends
 
 
-def _generate_headline(ticker: str, trend: str, security_id: int) -> str:
+def _pick_template(trend: str, security_id: int) -> str:
     """Pick a trend-appropriate headline template for the given security."""
     templates = _TEMPLATES[trend]
-    template = templates[security_id % len(templates)]
-    return template.format(ticker=ticker)
+    return templates[security_id % len(templates)]
+
+
+def _generate_headline(ticker: str, trend: str, security_id: int) -> str:
+    """Return the security's headline with its ticker filled in."""
+    return _pick_template(trend, security_id).format(ticker=ticker)
 
 
 def _score_headline(headline: str) -> tuple[str, int, int, int]:
@@ -135,9 +124,9 @@ def _score_headline(headline: str) -> tuple[str, int, int, int]:
         (sentiment_label, net_score, bullish_hits, bearish_hits)
         sentiment_label: 'positive' | 'negative' | 'neutral'
     """
-    words = set(headline.lower().replace(",", "").replace(";", "").replace(":", "").split())
-    bullish_hits = len(words & BULLISH_WORDS)
-    bearish_hits = len(words & BEARISH_WORDS)
+    found = set(_KEYWORD_RE.findall(headline.lower()))
+    bullish_hits = len(found & BULLISH_WORDS)
+    bearish_hits = len(found & BEARISH_WORDS)
     net = bullish_hits - bearish_hits
 
     if net > 0:
@@ -150,6 +139,23 @@ def _score_headline(headline: str) -> tuple[str, int, int, int]:
     return label, net, bullish_hits, bearish_hits
 
 
+# Every template is scored once at import. The {ticker} placeholder never
+# matches a keyword, so a generated headline scores exactly like its template
+# unless the ticker itself happens to be a keyword.
+_TEMPLATE_SCORES = {
+    template: _score_headline(template)
+    for templates in _TEMPLATES.values()
+    for template in templates
+}
+
+
+def _score_generated(template: str, ticker: str) -> tuple[str, int, int, int]:
+    """Score a headline generated from `template` via the precomputed table."""
+    if _KEYWORD_RE.search(ticker.lower()):
+        return _score_headline(template.format(ticker=ticker))
+    return _TEMPLATE_SCORES[template]
+
+
 def analyze_sentiment() -> dict:
     """
     Run sentiment analysis for all securities and write alerts to the Alert table.
@@ -173,47 +179,42 @@ def analyze_sentiment() -> dict:
     results = []
     breakdown = {"positive": 0, "neutral": 0, "negative": 0}
 
-    insert_sql = """
-        INSERT INTO Alert (account_id, alert_type, severity, message)
-        VALUES (%s, %s, %s, %s)
-    """
-
-    alerts_written = 0
-    with managed_conn() as conn:
-        cur = conn.cursor()
-
-        for sid, info in sorted(trends.items()):
-            headline = _generate_headline(info["ticker"], info["trend"], sid)
-            label, net_score, bull_hits, bear_hits = _score_headline(headline)
-            severity = _SEVERITY[label]
-            breakdown[label] += 1
-
-            message = (
-                f"Sentiment analysis for {info['ticker']} ({info['security_name']}): "
-                f"{label.upper()} (score {net_score:+d}, "
-                f"{bull_hits} bullish / {bear_hits} bearish keywords). "
-                f"Headline: \"{headline}\". "
-                f"3-day momentum: {info['momentum_pct']:+.2f}%."
-            )
-
-            cur.execute(insert_sql, (info["account_id"], "Sentiment", severity, message))
-            alerts_written += 1
-
-            results.append({
-                "security_id":   sid,
-                "ticker":        info["ticker"],
-                "security_name": info["security_name"],
-                "trend":         info["trend"],
-                "momentum_pct":  info["momentum_pct"],
-                "headline":      headline,
-                "sentiment":     label,
-                "net_score":     net_score,
-                "bullish_hits":  bull_hits,
-                "bearish_hits":  bear_hits,
-                "severity":      severity,
-            })
-
-        conn.commit()
+    params = []
+    for sid, info in sorted(trends.items()):
+        headline = _generate_headline(info["ticker"], info["trend"], sid)
+        label, net_score, bull_hits, bear_hits = _score_generated(
+            _pick_template(info["trend"], sid), info["ticker"]
+        )
+        severity = _SEVERITY[label]
+        breakdown[label] += 1
+
+        message = (
+            f"Sentiment analysis for {info['ticker']} ({info['security_name']}): "
+            f"{label.upper()} (score {net_score:+d}, "
+            f"{bull_hits} bullish / {bear_hits} bearish keywords). "
+            f"Headline: \"{headline}\". "
+            f"3-day momentum: {info['momentum_pct']:+.2f}%."
+        )
+        params.append((info["account_id"], "Sentiment", severity, message))
+
+        results.append({
+            "security_id":   sid,
+            "ticker":        info["ticker"],
+            "security_name": info["security_name"],
+            "trend":         info["trend"],
+            "momentum_pct":  info["momentum_pct"],
+            "headline":      headline,
+            "sentiment":     label,
+            "net_score":     net_score,
+            "bullish_hits":  bull_hits,
+            "bearish_hits":  bear_hits,
+            "severity":      severity,
+        })
+
+    with managed_txn() as conn:
+        alerts_written = bulk_insert(
+            conn, "Alert", ("account_id", "alert_type", "severity", "message"), params
+        )
 
     return {
         "securities_analysed": len(results),
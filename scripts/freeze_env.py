@@ -0,0 +1,42 @@
+"""
+freeze_env.py — Bake .env into utils/_env_frozen.py for deployment.
+
+utils/db.py imports the generated module instead of locating and parsing
+.env with python-dotenv at startup. Run it at build time (CI, Dockerfile)
+after .env is in place:
+
+    python scripts/freeze_env.py [path/to/.env]
+
+Real environment variables still override the frozen values. The output
+holds credentials and is git-ignored; re-run after every .env change.
+"""
+
+import sys
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+ROOT = Path(__file__).resolve().parent.parent
+OUTPUT = ROOT / "utils" / "_env_frozen.py"
+
+
+def main() -> None:
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / ".env"
+    if not source.is_file():
+        sys.exit(f"freeze_env: {source} not found")
+
+    values = {k: v for k, v in dotenv_values(source).items() if v is not None}
+    lines = [
+        f'"""Generated from {source.name} by scripts/freeze_env.py — do not edit."""',
+        "",
+        "ENV = {",
+        *(f"    {key!r}: {value!r}," for key, value in values.items()),
+        "}",
+        "",
+    ]
+    OUTPUT.write_text("\n".join(lines), encoding="utf-8")
+    print(f"freeze_env: wrote {len(values)} values to {OUTPUT.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+cache.py — In-process TTL cache for FinPort-AI.
+
+Price_History changes slowly (end-of-day pricing), so its shared loader,
+models.price_history.load_price_history(), is wrapped with ttl_cache() and
+repeated forecast/sentiment calls within the TTL are served from memory.
+"""
+
+import functools
+import threading
+import time
+
+CACHE_TTL_SECONDS = 300.0
+
+
+def ttl_cache(seconds: float = CACHE_TTL_SECONDS):
+    """Cache the result of a zero-argument loader for `seconds`.
+
+    Concurrent callers on a cold cache wait for a single load instead of all
+    hitting the database. The wrapped function gains a cache_clear() method.
+
+    Usage:
+        @ttl_cache()
+        def load_price_history() -> dict[int, list[dict]]:
+            ...
+    """
+    def decorator(fn):
+        lock = threading.Lock()
+        state = {"value": None, "expires": 0.0}
+
+        @functools.wraps(fn)
+        def wrapper():
+            with lock:
+                if time.monotonic() >= state["expires"]:
+                    state["value"] = fn()
+                    state["expires"] = time.monotonic() + seconds
+                return state["value"]
+
+        def cache_clear():
+            with lock:
+                state["value"] = None
+                state["expires"] = 0.0
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -2,44 +2,652 @@
 db.py — MySQL connection helper for FinPort-AI.
 
 Reads connection config from .env and provides:
-  - get_connection()  — returns a plain mysql.connector connection
-  - managed_conn()    — context manager that auto-closes the connection
+  - get_env()         — looks up a setting from .env / the environment
+  - get_connection()  — returns a connection checked out of the shared pool
+                        (raises DBBusyError when none frees up in time)
+  - managed_conn()    — context manager that returns the connection to the pool
+  - transaction()     — runs a block of writes on a connection as one transaction
+  - managed_txn()     — managed_conn() inside one transaction, committed on success
+  - thread_local_conn() — context manager over one long-lived connection per thread
+  - prepared_cursor() — server-side prepared statement, reused per connection
+  - async_managed_conn() — async counterpart of managed_conn() via aiomysql, if installed
+  - stream_query()    — runs a SELECT on an unbuffered cursor, yielding row batches
+  - bulk_insert()     — writes many rows with multi-row INSERT statements
+  - read_frame()      — bulk-loads a SELECT into pandas via connectorx, if installed
+
+The MySQL driver and the optional connectorx/aiomysql packages are imported
+on first use, so importing this module (e.g. for print_tuning_profile()) does
+not load them.
 """
 
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
 import os
-from contextlib import contextmanager
+import queue
+import tempfile
+import threading
+import time
+import types
+import warnings
+import weakref
+from collections.abc import Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Final, Literal
+from urllib.parse import quote
+
+if TYPE_CHECKING:
+    from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
+
+
+@functools.cache
+def _driver():
+    """Import mysql.connector (with its pooling module) and return it."""
+    import mysql.connector
+    import mysql.connector.pooling
+
+    return mysql.connector
+
+
+@functools.cache
+def _optional_module(name: str):
+    """Import an optional accelerator package, or return None if it is missing."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+@functools.cache
+def _load_config() -> dict[str, str]:
+    """Return .env merged under os.environ, parsed once per process.
+
+    Deployments that ran scripts/freeze_env.py get the values from the
+    generated utils/_env_frozen.py and never load python-dotenv. Real
+    environment variables win over .env, as with load_dotenv(). The values
+    are not copied into os.environ.
+    """
+    try:
+        from utils._env_frozen import ENV as dotenv  # type: ignore[import-not-found]
+    except ImportError:
+        from dotenv import dotenv_values, find_dotenv
+
+        dotenv = {k: v for k, v in dotenv_values(find_dotenv()).items() if v is not None}
+    return {**dotenv, **os.environ}
+
+
+_ENV: Final = _load_config()
+
+
+def get_env(key: str, default: str | None = None) -> str | None:
+    """Return setting `key` from the environment or .env, else `default`.
+
+    .env values are not exported to os.environ, so use this rather than
+    os.getenv() for anything configured there (e.g. NEWS_API_KEY).
+    """
+    return _ENV.get(key, default)
+
+
+# LOAD DATA LOCAL INFILE needs local_infile=ON on the server, so it is opt-in.
+_LOCAL_INFILE: Final = _ENV.get("DB_LOCAL_INFILE") == "1"
+
+# get_connection() gives up with DBBusyError after this long, so connects are
+# capped to the same budget (whole seconds, at least one).
+_MAX_WAIT_SECONDS: Final = int(_ENV.get("DB_MAX_WAIT_MS", 2000)) / 1000
+
+
+def _primary_config() -> dict:
+    """Build the connection kwargs for the primary from _ENV."""
+    config = {
+        "host": _ENV.get("DB_HOST", "localhost"),
+        "port": int(_ENV.get("DB_PORT", 3306)),
+        "user": _ENV.get("DB_USER", "root"),
+        "password": _ENV.get("DB_PASSWORD", ""),
+        "database": _ENV.get("DB_NAME", "finport"),
+        "ssl_disabled": True,
+        # Client-side tuning (server side: print_tuning_profile()). autocommit
+        # keeps plain reads from holding a snapshot transaction open on a
+        # pooled connection — the pool does not reset sessions — and drops the
+        # implicit BEGIN/COMMIT round-trips; multi-statement writes must open
+        # their own transaction (managed_txn()).
+        "connection_timeout": max(1, min(5, int(_MAX_WAIT_SECONDS))),
+        "autocommit": True,
+        "get_warnings": False,
+        "consume_results": True,
+        "use_unicode": True,
+        "charset": "utf8mb4",
+    }
+    if _LOCAL_INFILE:
+        # The client may only send files from the temp directory.
+        config["allow_local_infile_in_path"] = tempfile.gettempdir()
+    # zlib on the wire trades client/server CPU for bandwidth, which only
+    # pays off when MySQL is across a slow link — opt-in.
+    if _ENV.get("DB_COMPRESS") == "1":
+        config["compress"] = True
+    return config
+
+
+def _replica_config() -> types.MappingProxyType | None:
+    """Build the read-replica kwargs, or None when DB_HOST_RO is unset.
+
+    Credentials default to the primary's. Sessions are READ ONLY so a stray
+    write fails loudly.
+    """
+    if not _ENV.get("DB_HOST_RO"):
+        return None
+    return types.MappingProxyType({
+        **_DB_CONFIG,
+        "host": _ENV["DB_HOST_RO"],
+        "port": int(_ENV.get("DB_PORT_RO", _DB_CONFIG["port"])),
+        "user": _ENV.get("DB_USER_RO", _DB_CONFIG["user"]),
+        "password": _ENV.get("DB_PASSWORD_RO", _DB_CONFIG["password"]),
+        "init_command": "SET SESSION TRANSACTION READ ONLY",
+    })
+
+
+# Built once and read-only from here on.
+_DB_CONFIG: Final = types.MappingProxyType(_primary_config())
+_RO_CONFIG: Final = _replica_config()
+
+# mysql-connector caps a pool at 32 connections.
+_POOL_SIZE: Final = int(_ENV.get("DB_POOL_SIZE", 16))
+
+# At most twice the pool size may wait for a checkout at once.
+_checkout_slots = threading.BoundedSemaphore(_POOL_SIZE * 2)
+
+# Circuit breaker: this many connection failures within the window opens it,
+# and while open every checkout fails fast instead of piling reconnects onto
+# a struggling server.
+_BREAKER_FAILURES: Final = 3
+_BREAKER_WINDOW_SECONDS: Final = 10.0
+_BREAKER_OPEN_SECONDS: Final = 5.0
+
+# Idle pooled connections are pinged this often so they outlive the server's
+# wait_timeout; 0 disables the keepalive thread.
+_KEEPALIVE_SECONDS: Final = int(_ENV.get("DB_KEEPALIVE_SEC", 60))
 
-import mysql.connector
-from dotenv import load_dotenv
+# Rows per multi-row INSERT — keeps each statement well under the server's
+# max_allowed_packet while still writing hundreds of rows per round-trip.
+_INSERT_BATCH_ROWS: Final = 1000
 
-load_dotenv()
+# Above this many rows bulk_insert() streams a LOAD DATA file instead, when
+# DB_LOCAL_INFILE=1.
+_LOAD_DATA_MIN_ROWS: Final = 10_000
 
-_DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASSWORD", ""),
-    "database": os.getenv("DB_NAME", "finport"),
-    "ssl_disabled": True,
-}
+# LOAD DATA's default escaping: backslash, tab and newline are backslashed.
+_INFILE_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\0": "\\0"})
 
+# Pools open all of their connections when constructed, so each is built on
+# first use rather than at import — the server can start before MySQL is up.
+# Keyed by role; "ro" shares the "rw" pool when no replica is configured.
+_pools: dict[str, MySQLConnectionPool] = {}
+_pool_lock = threading.Lock()
 
-def get_connection() -> mysql.connector.MySQLConnection:
-    """Return an open MySQL connection using credentials from .env."""
-    return mysql.connector.connect(**_DB_CONFIG)
+
+def _get_pool(role: Literal["rw", "ro"] = "rw") -> MySQLConnectionPool:
+    """Return the process-wide connection pool for `role`, creating it on first call."""
+    pool = _pools.get(role)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(role)
+            if pool is None:
+                pool = _pools[role] = _build_pool(role)
+    return pool
+
+
+def _connect_args(config: types.MappingProxyType) -> dict:
+    """Return `config` plus use_pure, decided once the driver is imported.
+
+    Connections use the bundled C extension whenever the connector could
+    actually load it (HAVE_CEXT); otherwise they fall back to the pure-Python
+    protocol, which still works, just slower. Checking for the .so file alone
+    is not enough — it can exist and fail to load (e.g. a libssl mismatch).
+    """
+    return {**config, "use_pure": not _driver().HAVE_CEXT}
+
+
+def _build_pool(role: str) -> MySQLConnectionPool:
+    """Create the pool for `role` and start its keepalive thread."""
+    config = _RO_CONFIG if role == "ro" else _DB_CONFIG
+    if config is None:
+        return _pools.get("rw") or _build_pool("rw")
+    connect_args = _connect_args(config)
+    if connect_args["use_pure"]:
+        # Not fatal, but every row is then decoded in Python; usually a
+        # source build or a platform without the binary wheel.
+        warnings.warn(
+            "mysql-connector C extension (_mysql_connector) not available; "
+            "falling back to the much slower pure-Python protocol",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+    # Nothing here changes session state after connect, so the
+    # COM_RESET_CONNECTION round-trip on every return to the pool is skipped.
+    pool = _driver().pooling.MySQLConnectionPool(
+        pool_name="finport_ro" if role == "ro" else "finport",
+        pool_size=_POOL_SIZE,
+        pool_reset_session=False,
+        **connect_args,
+    )
+    _pools[role] = pool
+    if _KEEPALIVE_SECONDS > 0:
+        threading.Thread(
+            target=_keepalive_loop, args=(pool,),
+            name=f"finport-db-keepalive-{role}", daemon=True,
+        ).start()
+    return pool
+
+
+def _keepalive_loop(pool: MySQLConnectionPool) -> None:
+    """Ping every idle connection in `pool` each _KEEPALIVE_SECONDS, forever.
+
+    Each connection is taken out of the pool's queue (under the connector's
+    pool lock, as checkout does), pinged with the lock released, and handed
+    back — so a slow ping against an unreachable server never stalls other
+    checkouts or returns. Failures are ignored: checkout pings and reconnects
+    a dead connection anyway.
+    """
+    lock = _driver().pooling.CONNECTION_POOL_LOCK
+    while True:
+        time.sleep(_KEEPALIVE_SECONDS)
+        # The queue is FIFO, so qsize() take-and-return rounds visit each idle
+        # connection once.
+        for _ in range(pool._cnx_queue.qsize()):
+            with lock:
+                try:
+                    cnx = pool._cnx_queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                cnx.ping(reconnect=True, attempts=1, delay=0)
+            except _driver().Error:
+                pass
+            finally:
+                pool.add_connection(cnx)
+
+
+def print_tuning_profile() -> None:
+    """Print the my.cnf settings that match this client's pool configuration.
+
+    max_connections has to cover every worker's pool, and thread_pool_size
+    follows the NCPU..1.5*NCPU rule for the server's thread pool.
+    """
+    ncpu = os.cpu_count() or 1
+    print(f"""[mysqld]
+# One uvicorn worker per CPU, each with up to DB_POOL_SIZE={_POOL_SIZE} connections, plus headroom.
+max_connections                = {_POOL_SIZE * ncpu + 50}
+# Roughly 70% of RAM on a dedicated database host.
+innodb_buffer_pool_size        = 4G
+# Flush the redo log once a second rather than on every commit (an OS crash
+# can lose up to a second of commits).
+innodb_flush_log_at_trx_commit = 2
+# Thread pool: Percona Server / MariaDB (MySQL Enterprise uses the thread_pool plugin).
+thread_handling                = pool-of-threads
+thread_pool_size               = {ncpu + ncpu // 2}
+# Raise net.core.somaxconn to at least back_log.
+back_log                       = {max(_POOL_SIZE * ncpu, 80)}""")
+
+
+class DBBusyError(Exception):
+    """No connection could be checked out in time, or the circuit is open."""
+
+
+_breaker_lock = threading.Lock()
+_breaker_failures: list[float] = []
+_breaker_open_until = 0.0
+
+
+def _record_connect_failure() -> None:
+    """Count a failed connect and open the breaker if failures are clustering."""
+    global _breaker_open_until
+    now = time.monotonic()
+    with _breaker_lock:
+        _breaker_failures[:] = [t for t in _breaker_failures if now - t < _BREAKER_WINDOW_SECONDS]
+        _breaker_failures.append(now)
+        if len(_breaker_failures) >= _BREAKER_FAILURES:
+            _breaker_open_until = now + _BREAKER_OPEN_SECONDS
+            _breaker_failures.clear()
+
+
+def get_connection(role: Literal["rw", "ro"] = "rw") -> PooledMySQLConnection:
+    """Return a pooled MySQL connection; close() hands it back to the pool.
+
+    role="ro" draws from the read-replica pool (DB_HOST_RO), whose sessions
+    are read-only; without a replica it falls back to the primary.
+
+    The whole checkout — waiting for the connector's pool lock, which another
+    thread may hold while it reconnects, and retrying an exhausted pool with
+    exponential backoff — is bounded by DB_MAX_WAIT_MS. Connection errors
+    feed a circuit breaker; while it is open calls fail immediately.
+
+    Raises:
+        DBBusyError: if the wait runs out or the breaker is open.
+    """
+    if time.monotonic() < _breaker_open_until:
+        raise DBBusyError("database circuit breaker is open")
+    deadline = time.monotonic() + _MAX_WAIT_SECONDS
+    if not _checkout_slots.acquire(timeout=_MAX_WAIT_SECONDS):
+        raise DBBusyError("too many callers waiting for a database connection")
+    try:
+        lock = _driver().pooling.CONNECTION_POOL_LOCK
+        delay = 0.005
+        while True:
+            # The connector takes this (reentrant) lock itself and runs the
+            # checkout ping/reconnect under it; acquiring it first with a
+            # timeout keeps another thread's slow reconnect from stalling us
+            # past the deadline. Building the pool happens outside it.
+            try:
+                pool = _get_pool(role)
+                if not lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                    raise DBBusyError("timed out waiting for the connection pool")
+                try:
+                    conn = pool.get_connection()
+                finally:
+                    lock.release()
+            except _driver().errors.PoolError as err:
+                exhausted = err
+            except _driver().Error:
+                _record_connect_failure()
+                raise
+            else:
+                with _breaker_lock:
+                    _breaker_failures.clear()
+                return conn
+            # Sleep with the lock released so returning callers can refill
+            # the pool.
+            if time.monotonic() + delay > deadline:
+                raise DBBusyError("connection pool exhausted") from exhausted
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+    finally:
+        _checkout_slots.release()
 
 
 @contextmanager
-def managed_conn():
-    """Context manager that yields a connection and closes it on exit.
+def managed_conn(role: Literal["rw", "ro"] = "rw"):
+    """Context manager that yields a pooled connection and releases it on exit.
 
     Usage:
         with managed_conn() as conn:
             cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT ...")
+
+    Pass role="ro" for SELECT-only work that can tolerate replica lag.
     """
-    conn = get_connection()
+    conn = get_connection(role)
     try:
         yield conn
     finally:
+        _release_prepared(conn)
         conn.close()
+
+
+@contextmanager
+def transaction(conn, isolation: str = "READ COMMITTED"):
+    """Context manager that runs the block as one transaction on `conn`.
+
+    Commits when the block exits normally and rolls back if it raises. For
+    callers that read first and only write at the end: open the transaction
+    just around the writes so it is not held through the reads.
+
+    Usage:
+        with managed_conn() as conn:
+            rows = ...  # reads, autocommitted
+            with transaction(conn):
+                bulk_insert(conn, "Alert", columns, rows)
+    """
+    conn.start_transaction(isolation_level=isolation)
+    try:
+        yield conn
+    except BaseException:
+        try:
+            conn.rollback()
+        except _driver().Error:
+            pass  # connection is gone; the server rolls back on disconnect
+        raise
+    conn.commit()
+
+
+@contextmanager
+def managed_txn(isolation: str = "READ COMMITTED"):
+    """Context manager that yields a pooled connection inside one transaction.
+
+    Commits when the block exits normally and rolls back if it raises, so all
+    of a caller's writes reach the log in a single flush. Anything that writes
+    (alerts, forecasts, rebalance logs) should use this rather than
+    managed_conn(), whose connections autocommit every statement.
+
+    Usage:
+        with managed_txn() as conn:
+            bulk_insert(conn, "Alert", columns, rows)
+    """
+    with managed_conn() as conn, transaction(conn, isolation):
+        yield conn
+
+
+# aiomysql pools are bound to the event loop that created them; the server
+# runs a single loop, so one lazily built pool is enough.
+_aio_pool = None
+_aio_pool_lock = asyncio.Lock()
+
+
+async def _get_aio_pool():
+    """Return the process-wide aiomysql pool, creating it on first call."""
+    global _aio_pool
+    if _aio_pool is None:
+        async with _aio_pool_lock:
+            if _aio_pool is None:
+                _aio_pool = await _optional_module("aiomysql").create_pool(
+                    host=_DB_CONFIG["host"],
+                    port=_DB_CONFIG["port"],
+                    user=_DB_CONFIG["user"],
+                    password=_DB_CONFIG["password"],
+                    db=_DB_CONFIG["database"],
+                    charset=_DB_CONFIG["charset"],
+                    autocommit=_DB_CONFIG["autocommit"],
+                    connect_timeout=_DB_CONFIG["connection_timeout"],
+                    minsize=1,
+                    maxsize=_POOL_SIZE,
+                )
+    return _aio_pool
+
+
+@asynccontextmanager
+async def async_managed_conn():
+    """Async context manager that yields an aiomysql connection from a shared pool.
+
+    Lets I/O-bound fan-out (one query per ticker, say) run concurrently on the
+    event loop instead of occupying a worker thread per query:
+
+        async with async_managed_conn() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute("SELECT ...")
+                rows = await cur.fetchall()
+
+    Raises:
+        RuntimeError: if aiomysql is not installed.
+    """
+    if _optional_module("aiomysql") is None:
+        raise RuntimeError("async_managed_conn() requires aiomysql (pip install aiomysql)")
+    pool = await _get_aio_pool()
+    async with pool.acquire() as conn:
+        yield conn
+
+
+# A thread's connection is pinged before reuse only after it has sat idle this
+# long; below it the server cannot have timed the session out.
+_TLS_IDLE_PING_SECONDS = 30.0
+_tls = threading.local()
+
+
+@contextmanager
+def thread_local_conn():
+    """Context manager that yields this thread's own connection and keeps it open.
+
+    For batch scripts issuing many short statements from one thread: the
+    first call opens a dedicated connection (outside the pool) and later calls
+    reuse it, pinging/reconnecting first if it has been idle. It is closed
+    when the thread object is collected or the interpreter exits. Queries the
+    server may kill (long reports, lock waits) should use managed_conn().
+    """
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        conn = _driver().connect(**_connect_args(_DB_CONFIG))
+        _tls.conn = conn
+        # weakref.finalize also runs at interpreter exit (atexit), so this
+        # covers both thread teardown and shutdown.
+        weakref.finalize(threading.current_thread(), _close_thread_conn, conn)
+    elif time.monotonic() - _tls.last_used > _TLS_IDLE_PING_SECONDS:
+        _release_prepared(conn)  # a reconnect would invalidate the handles
+        conn.ping(reconnect=True, attempts=1, delay=0)
+    try:
+        yield conn
+    finally:
+        _tls.last_used = time.monotonic()
+
+
+# id(conn) -> {sql: prepared cursor}. Entries are dropped when managed_conn()
+# releases the connection, since the pool does not reset the session and the
+# server-side statements would otherwise pile up.
+_prepared: dict[int, dict] = {}
+
+
+def prepared_cursor(conn, sql: str):
+    """Return a prepared cursor for `sql` on `conn`, preparing it only once.
+
+    Executing the same statement again on the same connection sends just the
+    statement id and parameters (COM_STMT_EXECUTE) instead of re-parsing:
+
+        cur = prepared_cursor(conn, "SELECT ... WHERE id = %s")
+        cur.execute("SELECT ... WHERE id = %s", (42,))
+
+    The connector compares the statement by identity, so pass the same string
+    object each time (a module-level constant) rather than rebuilding it.
+    Only use this with connections from managed_conn() or thread_local_conn(),
+    which close the statements when they release or reconnect the connection.
+    """
+    statements = _prepared.setdefault(id(conn), {})
+    cur = statements.get(sql)
+    if cur is None:
+        cur = statements[sql] = conn.cursor(prepared=True)
+    return cur
+
+
+def _close_thread_conn(conn) -> None:
+    """Close a thread_local_conn() connection along with its prepared cursors.
+
+    Dropping the _prepared entry matters: the cursors only hold the connection
+    through a weak proxy, so once it is gone its id can be reused by another
+    connection, which would then be handed these dead cursors.
+    """
+    _release_prepared(conn)
+    conn.close()
+
+
+def _release_prepared(conn) -> None:
+    """Close every prepared cursor cached for `conn`."""
+    for cur in _prepared.pop(id(conn), {}).values():
+        try:
+            cur.close()
+        except _driver().Error:
+            pass  # connection already gone; the server dropped the statement
+
+
+def stream_query(conn, sql: str, params: Sequence = (), arraysize: int = 1000) -> Iterator[list]:
+    """Run `sql` on an unbuffered cursor and yield the rows in lists of `arraysize`.
+
+    Rows are read off the socket as batches are consumed, so only one batch is
+    held in memory at a time. The connection cannot run other statements
+    until the generator is exhausted.
+    """
+    cur = conn.cursor(buffered=False)
+    cur.execute(sql, params)
+    cur.arraysize = arraysize
+    yield from iter(cur.fetchmany, [])
+
+
+def bulk_insert(conn, table: str, columns: Sequence[str], rows: Sequence[Sequence]) -> int:
+    """Insert rows using INSERT ... VALUES (...), (...), ... statements.
+
+    One statement (one parse, one round-trip) is sent per _INSERT_BATCH_ROWS
+    rows. With DB_LOCAL_INFILE=1, more than _LOAD_DATA_MIN_ROWS rows are
+    written as a single LOAD DATA LOCAL INFILE instead. Run it inside
+    managed_txn() so the batches commit together.
+    `table` and `columns` are interpolated into the SQL and must come from
+    code, never from user input.
+
+    Returns:
+        Number of rows inserted.
+    """
+    if not rows:
+        return 0
+    column_sql = ", ".join(columns)
+    if _LOCAL_INFILE and len(rows) > _LOAD_DATA_MIN_ROWS:
+        return _load_data(conn, table, column_sql, rows)
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    cur = conn.cursor()
+    for start in range(0, len(rows), _INSERT_BATCH_ROWS):
+        batch = rows[start:start + _INSERT_BATCH_ROWS]
+        cur.execute(
+            f"INSERT INTO {table} ({column_sql}) VALUES {', '.join([row_sql] * len(batch))}",
+            [value for row in batch for value in row],
+        )
+    return len(rows)
+
+
+def _infile_value(value) -> str:
+    """Format one value as a field of a tab-separated LOAD DATA file."""
+    if value is None:
+        return "\\N"
+    return str(value).translate(_INFILE_ESCAPES)
+
+
+def _load_data(conn, table: str, column_sql: str, rows: Sequence[Sequence]) -> int:
+    """Write `rows` to a temp file and send it with LOAD DATA LOCAL INFILE.
+
+    With LOCAL, MySQL downgrades duplicate-key and conversion errors to
+    warnings and skips or truncates the row, so the loaded count is checked
+    against len(rows) to fail as a whole, like the INSERT path.
+    """
+    fd, path = tempfile.mkstemp(suffix=".tsv")
+    try:
+        with open(fd, "w", encoding="utf-8", newline="") as f:
+            f.writelines(
+                "\t".join(map(_infile_value, row)) + "\n" for row in rows
+            )
+        cur = conn.cursor()
+        cur.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+            f"CHARACTER SET utf8mb4 ({column_sql})",
+            (path,),
+        )
+    finally:
+        os.remove(path)
+    if cur.rowcount != len(rows):
+        raise _driver().errors.DataError(
+            f"LOAD DATA loaded {cur.rowcount} of {len(rows)} rows into {table}"
+        )
+    return cur.rowcount
+
+
+def _db_url() -> str:
+    """Return _DB_CONFIG as a mysql:// URL for connectorx."""
+    return (
+        f"mysql://{quote(_DB_CONFIG['user'], safe='')}:{quote(_DB_CONFIG['password'], safe='')}"
+        f"@{_DB_CONFIG['host']}:{_DB_CONFIG['port']}/{quote(_DB_CONFIG['database'], safe='')}"
+    )
+
+
+def read_frame(query: str):
+    """Run a SELECT through connectorx and return the result as a pandas DataFrame.
+
+    connectorx decodes the result set in Rust straight into column arrays, so
+    no per-row Python objects are created. Returns None when connectorx is not
+    installed; callers then fall back to a regular cursor.
+    """
+    connectorx = _optional_module("connectorx")
+    if connectorx is None:
+        return None
+    return connectorx.read_sql(_db_url(), query, return_type="pandas")